@@ -9,11 +9,14 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 
+import copy
+import dataclasses
 import tempfile
 from os import path
 from unittest import TestCase
 from uuid import uuid4
 
+import numpy as np
 import omf
 import pyarrow as pa
 from evo_schemas.components import (
@@ -34,26 +37,46 @@ from evo.data_converters.common import EvoWorkspaceMetadata, create_evo_object_s
 from evo.data_converters.omf.exporter import export_omf_surface
 from evo.data_converters.omf.importer import convert_omf
 
+# The object ID is not used to locate data in the local cache, so every export can share one
+_TEST_UUID = uuid4()
+
 
 class TestExportOMFSurface(TestCase):
-    def setUp(self) -> None:
-        self.cache_root_dir = tempfile.TemporaryDirectory()
-        self.workspace_metadata = EvoWorkspaceMetadata(workspace_id=str(uuid4()), cache_root=self.cache_root_dir.name)
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.cache_root_dir = tempfile.TemporaryDirectory()
+        cls.workspace_metadata = EvoWorkspaceMetadata(workspace_id=str(uuid4()), cache_root=cls.cache_root_dir.name)
 
-        _, self.data_client = create_evo_object_service_and_data_client(self.workspace_metadata)
+        _, cls.data_client = create_evo_object_service_and_data_client(cls.workspace_metadata)
 
-        # Convert an OMF file to Evo and use the generated Parquet files to test the exporter
+        # Convert an OMF file to Evo once and use the generated Parquet files to test the exporter.
+        # Tests that mutate an object work on a shallow copy so the shared objects stay untouched.
         omf_file = path.join(path.dirname(__file__), "../data/surface_v1.omf")
-        self.evo_objects = convert_omf(
-            filepath=omf_file, evo_workspace_metadata=self.workspace_metadata, epsg_code=32650
+        cls.evo_objects = convert_omf(filepath=omf_file, evo_workspace_metadata=cls.workspace_metadata, epsg_code=32650)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.cache_root_dir.cleanup()
+
+    def _make_chunks(self, start_segment_index: int, number_of_segments: int) -> IndexArray2_V1_0_1:
+        chunks_table = pa.table(
+            {
+                "start_segment_index": pa.array(np.array([start_segment_index], dtype=np.uint64)),
+                "number_of_segments": pa.array(np.array([number_of_segments], dtype=np.uint64)),
+            }
         )
+        return IndexArray2_V1_0_1(**self.data_client.save_table(chunks_table))
+
+    def _make_indices(self, indices: np.ndarray) -> IndexArray1_V1_0_1:
+        indices_table = pa.table({"index": pa.array(indices)})
+        return IndexArray1_V1_0_1(**self.data_client.save_table(indices_table))
 
     def test_should_create_expected_omf_surface_element(self) -> None:
-        evo_object = self.evo_objects[5]
+        evo_object = copy.copy(self.evo_objects[5])
         self.assertIsInstance(evo_object, TriangleMesh_V2_1_0)
 
         evo_object.description = "any description"
-        element = export_omf_surface(uuid4(), None, evo_object, self.data_client)
+        element = export_omf_surface(_TEST_UUID, None, evo_object, self.data_client)
 
         self.assertEqual(element.name, evo_object.name)
         self.assertEqual(element.description, evo_object.description)
@@ -63,15 +86,13 @@ class TestExportOMFSurface(TestCase):
         self.assertEqual(len(element.geometry.vertices), 100)
 
         vertex = element.geometry.vertices[0]
-        self.assertAlmostEqual(vertex[0], 0.55854415)
-        self.assertAlmostEqual(vertex[1], 0.12844872)
-        self.assertAlmostEqual(vertex[2], 0.13269596)
+        np.testing.assert_allclose(vertex, [0.55854415, 0.12844872, 0.13269596], rtol=0, atol=5e-8)
 
     def test_should_create_expected_omf_vertex_attributes(self) -> None:
         evo_object = self.evo_objects[5]
         self.assertIsInstance(evo_object, TriangleMesh_V2_1_0)
 
-        element = export_omf_surface(uuid4(), None, evo_object, self.data_client)
+        element = export_omf_surface(_TEST_UUID, None, evo_object, self.data_client)
 
         self.assertEqual(len(element.data), 1)
 
@@ -81,15 +102,16 @@ class TestExportOMFSurface(TestCase):
         self.assertEqual(scalar_data.location, "vertices")
         self.assertEqual(scalar_data.name, "data assigned to vertices")
 
-        self.assertEqual(len(scalar_data.array), 100)
-        self.assertAlmostEqual(scalar_data.array[0], 0.06727262)
-        self.assertAlmostEqual(scalar_data.array[1], 0.25991388)
+        values = scalar_data.array.array
+        self.assertIsInstance(values, np.ndarray)
+        self.assertEqual(len(values), 100)
+        np.testing.assert_allclose(values[:2], [0.06727262, 0.25991388], rtol=0, atol=5e-8)
 
     def test_should_create_expected_omf_face_attributes(self) -> None:
         evo_object = self.evo_objects[6]
         self.assertIsInstance(evo_object, TriangleMesh_V2_1_0)
 
-        element = export_omf_surface(uuid4(), None, evo_object, self.data_client)
+        element = export_omf_surface(_TEST_UUID, None, evo_object, self.data_client)
 
         self.assertEqual(len(element.data), 1)
 
@@ -99,9 +121,10 @@ class TestExportOMFSurface(TestCase):
         self.assertEqual(scalar_data.location, "faces")
         self.assertEqual(scalar_data.name, "data assigned to faces")
 
-        self.assertEqual(len(scalar_data.array), 50)
-        self.assertAlmostEqual(scalar_data.array[0], 0.30219228)
-        self.assertAlmostEqual(scalar_data.array[1], 0.44245225)
+        values = scalar_data.array.array
+        self.assertIsInstance(values, np.ndarray)
+        self.assertEqual(len(values), 50)
+        np.testing.assert_allclose(values[:2], [0.30219228, 0.44245225], rtol=0, atol=5e-8)
 
     def test_should_create_expected_omf_surface_element_from_old_object_schema(self) -> None:
         triangle_mesh_object = self.evo_objects[5]
@@ -116,6 +139,9 @@ class TestExportOMFSurface(TestCase):
             nan_description=continuous_attribute.nan_description,
         )
 
+        vertices = triangle_mesh_object.triangles.vertices
+        indices = triangle_mesh_object.triangles.indices
+
         evo_object = TriangleMesh_V2_0_0(
             name=triangle_mesh_object.name,
             description="any description",
@@ -124,15 +150,21 @@ class TestExportOMFSurface(TestCase):
             coordinate_reference_system=triangle_mesh_object.coordinate_reference_system,
             triangles=Triangles_V1_1_0(
                 vertices=Triangles_V1_1_0_Vertices(
-                    **{**triangle_mesh_object.triangles.vertices.as_dict(), "attributes": [old_continuous_attribute]}
+                    **{
+                        **{field.name: getattr(vertices, field.name) for field in dataclasses.fields(vertices)},
+                        "attributes": [old_continuous_attribute],
+                    }
                 ),
                 indices=Triangles_V1_1_0_Indices(
-                    **{**triangle_mesh_object.triangles.indices.as_dict(), "attributes": []}
+                    **{
+                        **{field.name: getattr(indices, field.name) for field in dataclasses.fields(indices)},
+                        "attributes": [],
+                    }
                 ),
             ),
         )
 
-        element = export_omf_surface(uuid4(), None, evo_object, self.data_client)
+        element = export_omf_surface(_TEST_UUID, None, evo_object, self.data_client)
 
         self.assertEqual(element.name, evo_object.name)
         self.assertEqual(element.description, evo_object.description)
@@ -151,71 +183,33 @@ class TestExportOMFSurface(TestCase):
         self.assertEqual(len(scalar_data.array), 100)
 
     def test_should_unpack_chunked_triangles(self) -> None:
-        evo_object = self.evo_objects[6]
+        evo_object = copy.copy(self.evo_objects[6])
 
         start_segment_index = 25
         number_of_segments = 10
 
-        chunks_schema = pa.schema(
-            [
-                pa.field("start_segment_index", pa.uint64()),
-                pa.field("number_of_segments", pa.uint64()),
-            ]
-        )
-        chunks_table = pa.Table.from_pydict(
-            {
-                "start_segment_index": [start_segment_index],
-                "number_of_segments": [number_of_segments],
-            },
-            schema=chunks_schema,
-        )
-        chunks_data = self.data_client.save_table(chunks_table)
-        chunks = IndexArray2_V1_0_1(**chunks_data)
+        chunks = self._make_chunks(start_segment_index, number_of_segments)
 
         evo_object.parts = EmbeddedTriangulatedMesh_V2_0_0_Parts(chunks=chunks)
 
-        element = export_omf_surface(uuid4(), None, evo_object, self.data_client)
+        element = export_omf_surface(_TEST_UUID, None, evo_object, self.data_client)
 
         self.assertEqual(len(element.geometry.vertices), 100)
         self.assertEqual(len(element.geometry.triangles), number_of_segments)
 
     def test_should_unpack_indexed_and_chunked_triangles(self) -> None:
-        evo_object = self.evo_objects[6]
+        evo_object = copy.copy(self.evo_objects[6])
 
         start_segment_index = 5
         number_of_segments = 5
 
-        chunks_schema = pa.schema(
-            [
-                pa.field("start_segment_index", pa.uint64()),
-                pa.field("number_of_segments", pa.uint64()),
-            ]
-        )
-        chunks_table = pa.Table.from_pydict(
-            {
-                "start_segment_index": [start_segment_index],
-                "number_of_segments": [number_of_segments],
-            },
-            schema=chunks_schema,
-        )
-        chunks_data = self.data_client.save_table(chunks_table)
-        chunks = IndexArray2_V1_0_1(**chunks_data)
+        chunks = self._make_chunks(start_segment_index, number_of_segments)
 
-        indices_schema = pa.schema(
-            [
-                pa.field("index", pa.uint64()),
-            ]
-        )
-        indices_table = pa.Table.from_pydict(
-            {"index": [0, 5, 10, 15, 20, 25, 30, 35, 40, 45]},
-            schema=indices_schema,
-        )
-        indices_data = self.data_client.save_table(indices_table)
-        indices = IndexArray1_V1_0_1(**indices_data)
+        indices = self._make_indices(np.array([0, 5, 10, 15, 20, 25, 30, 35, 40, 45], dtype=np.uint64))
 
         evo_object.parts = EmbeddedTriangulatedMesh_V2_0_0_Parts(chunks=chunks, triangle_indices=indices)
 
-        element = export_omf_surface(uuid4(), None, evo_object, self.data_client)
+        element = export_omf_surface(_TEST_UUID, None, evo_object, self.data_client)
 
         self.assertEqual(len(element.geometry.vertices), 100)
         self.assertEqual(len(element.geometry.triangles), number_of_segments)